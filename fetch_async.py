@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# fetch_async.py
+# Optional asyncio/aiohttp fan-out for player_api probing (used by main.py "Refresh All")
+# Requires: aiohttp (pip install aiohttp). main.py falls back to threads without it.
+
+import asyncio
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except Exception:
+    HAS_AIOHTTP = False
+
+CONNECTOR_LIMIT = 64
+DNS_CACHE_TTL = 300
+
+def _timeout(timeout, connect_timeout=None):
+    # per-socket limits only: time spent queued for a free connector slot must
+    # not count, or candidates waiting behind dead ports would time out unsent
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout or timeout, sock_read=timeout)
+
+async def _get_json(session, url, headers, timeout, connect_timeout):
+    """Returns (url, data, error, extra) so results can be matched up in completion order."""
+    try:
+        async with session.get(url, headers=headers, timeout=_timeout(timeout, connect_timeout), allow_redirects=True) as r:
+            validators = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+            if r.status == 304:
+                # answer to a conditional request: the caller keeps its saved data
+                return (url, None, None, dict(validators, not_modified=True))
+            if r.status != 200:
+                return (url, None, ValueError(f"HTTP status {r.status}"), None)
+            # Xtream panels often send JSON as text/html, so don't check content type
+            data = await r.json(content_type=None)
+            return (url, data, None, validators)
+    except Exception as e:
+        return (url, None, e, None)
+
+async def _first_json(session, urls, headers, timeout, connect_timeout):
+    """
+    Request all candidate urls at once; return the first 200 (or 304) answer in
+    the same dict shape as main.fetch_player_api_robust and cancel the rest.
+    """
+    tasks = [asyncio.ensure_future(_get_json(session, u, headers, timeout, connect_timeout)) for u in urls]
+    tried = []
+    try:
+        for done in asyncio.as_completed(tasks):
+            url, data, err, extra = await done
+            if err is None:
+                return {"ok": True, "endpoint": url, "client": "aiohttp", "data": data, **extra}
+            tried.append((url, err, "aiohttp"))
+    finally:
+        for t in tasks:
+            t.cancel()
+    return {"ok": False, "tried": tried}
+
+async def _fetch_all(url_lists, headers_list, user_agent, timeout, connect_timeout):
+    connector = aiohttp.TCPConnector(limit=CONNECTOR_LIMIT, ttl_dns_cache=DNS_CACHE_TTL)
+    async with aiohttp.ClientSession(headers={"User-Agent": user_agent}, connector=connector) as session:
+        return await asyncio.gather(*[_first_json(session, urls, headers, timeout, connect_timeout)
+                                      for urls, headers in zip(url_lists, headers_list)])
+
+def fetch_player_api_many(url_lists, user_agent, timeout=20, headers_list=None, connect_timeout=None):
+    """
+    url_lists: one list of candidate player_api URLs per server (may be empty).
+    headers_list: optional extra request headers per server (e.g. conditional ones).
+    connect_timeout: optional shorter limit for connecting (defaults to timeout).
+    Probes every server and candidate concurrently over one shared connector
+    and returns one result dict per server, in order.
+    """
+    if headers_list is None:
+        headers_list = [None] * len(url_lists)
+    return asyncio.run(_fetch_all(url_lists, headers_list, user_agent, timeout, connect_timeout))
@@ -2,6 +2,12 @@
 # xtream_pro_fix.py
 # Pro Termux Xtream Manager (Fixed & Robust)
 # Requires: requests (and optionally cloudscraper for Cloudflare bypass)
+# Optional speed-ups / extras, each used only when installed:
+#   aiohttp  - concurrent "Refresh All" probing (fetch_async.py)
+#   orjson   - faster servers.json / playlist JSON read and write
+#   ijson    - streaming load of large playlist JSON files
+#   keyring  - keep server passwords in the system keyring, not servers.json
+#   brotli   - accept br-compressed responses
 # Added: nicer progress bars for download, parsing, JSON save and M3U build (no external deps)
 
 import os
@@ -10,7 +16,17 @@ import time
 import requests
 import sys
 import re
+import functools
+import tempfile
+import socket
+import queue
 from getpass import getpass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
 
 # Try optional cloudscraper for CF bypass
 try:
@@ -19,6 +35,34 @@ try:
 except Exception:
     HAS_CLOUDSCRAPER = False
 
+# Try optional aiohttp fan-out (fetch_async.py) for refreshing many servers
+try:
+    import fetch_async
+    HAS_AIOHTTP = fetch_async.HAS_AIOHTTP
+except Exception:
+    HAS_AIOHTTP = False
+
+# Try optional orjson for faster JSON load/dump
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+# Try optional keyring to keep server passwords out of servers.json
+try:
+    import keyring
+    HAS_KEYRING = True
+except Exception:
+    HAS_KEYRING = False
+
+# Try optional ijson to stream items out of big parsed playlists
+try:
+    import ijson
+    HAS_IJSON = True
+except Exception:
+    HAS_IJSON = False
+
 # --------- Config / Paths ----------
 DATA_DIR = "xtream_data32"
 SERVERS_FILE = os.path.join(DATA_DIR, "servers.json")
@@ -34,8 +78,17 @@ class C:
     C = '\033[96m'
     RESET = '\033[0m'
 
+# bold cyan heading prelude, built once instead of per print
+BC = C.B + C.C
+RST = C.RESET
+
 def clear():
-    os.system("clear" if os.name != "nt" else "cls")
+    # ANSI home + clear screen + clear scrollback; no clear/cls subprocess per menu redraw
+    if os.name == "nt":
+        os.system("cls")
+        return
+    sys.stdout.write("\033[H\033[2J\033[3J")
+    sys.stdout.flush()
 
 def hr():
     print(C.C + "─" * 60 + C.RESET)
@@ -47,11 +100,19 @@ def is_tty():
     except:
         return False
 
-def print_progress_bar(count, total, prefix='', suffix='', length=40, fill='█'):
+# minimum seconds between progress redraws inside hot loops
+PROGRESS_INTERVAL = 0.1
+# channels per bulk dump when the total is unknown (streamed playlists)
+JSON_BATCH_SIZE = 1000
+# channels per writelines() call when building M3U files
+M3U_BATCH_SIZE = 1000
+
+def print_progress_bar(count, total, prefix='', suffix='', length=40, fill='█', unit='bytes'):
     """
     Simple progress bar that works in most terminals.
     count: current progress (int)
-    total: total steps (int). If total is 0 or None, prints bytes / unknown progress.
+    total: total steps (int). If total is 0 or None, prints count / unknown progress.
+    unit: label for the count when total is unknown.
     """
     if total and total > 0:
         proportion = max(0.0, min(1.0, float(count) / float(total)))
@@ -67,7 +128,7 @@ def print_progress_bar(count, total, prefix='', suffix='', length=40, fill='█'
         # Unknown total: show bytes downloaded count with a simple spinner
         spinner = ['-', '\\', '|', '/']
         s = spinner[count % len(spinner)]
-        sys.stdout.write(f"\r{prefix} {s} {count} bytes {suffix}")
+        sys.stdout.write(f"\r{prefix} {s} {count} {unit} {suffix}")
         sys.stdout.flush()
 
 # --------- Utilities ----------
@@ -79,22 +140,132 @@ def ensure_dirs():
         with open(SERVERS_FILE, "w", encoding="utf-8") as f:
             json.dump([], f, indent=2)
 
+def json_dumps_bytes(obj):
+    """Pretty (indent 2) UTF-8 encoded JSON; uses orjson when installed."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def json_loads(data):
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# last parsed servers.json, keyed by (st_mtime_ns, st_size) of the file it came from
+_SERVERS_CACHE = {"key": None, "data": []}
+
+def _servers_file_key():
+    try:
+        st = os.stat(SERVERS_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _remember_servers(key, servers):
+    _SERVERS_CACHE["key"] = key
+    _SERVERS_CACHE["data"] = [dict(s) for s in servers]
+
 def load_servers():
+    """
+    Every menu action starts here, so the parsed file is reused until servers.json
+    changes on disk. Callers get fresh per-server dicts and may modify them freely.
+    """
     ensure_dirs()
-    with open(SERVERS_FILE, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except:
-            return []
+    key = _servers_file_key()
+    if key is None or key != _SERVERS_CACHE["key"]:
+        with open(SERVERS_FILE, "rb") as f:
+            try:
+                servers = json_loads(f.read())
+            except:
+                servers = []
+        for s in servers:
+            # older files saved the full endpoint URL, password included; keep
+            # just its base so the next save drops the credentials
+            if s.get("last_endpoint") and "?" in s["last_endpoint"]:
+                s["last_endpoint"] = endpoint_base(s["last_endpoint"])
+            # likewise move inline passwords into a usable keyring; the record
+            # keeps only its password_ref, so the next save drops the plaintext
+            if HAS_KEYRING and s.get("password"):
+                store_password(s, s["password"])
+        _remember_servers(key, servers)
+    return [dict(s) for s in _SERVERS_CACHE["data"]]
 
 def save_servers(servers):
+    # write a sibling temp file and swap it in, so an interrupted save
+    # (Ctrl-C, full storage) never leaves a truncated servers.json
     ensure_dirs()
-    with open(SERVERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(servers, f, indent=2, ensure_ascii=False)
+    data = json_dumps_bytes(servers)
+    try:
+        with open(SERVERS_FILE, "rb") as f:
+            if f.read() == data:
+                # nothing changed: skip the rewrite
+                _remember_servers(_servers_file_key(), servers)
+                return
+    except OSError:
+        pass
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=DATA_DIR, prefix="servers.", suffix=".tmp", delete=False) as f:
+            tmp = f.name
+            f.write(data)
+            # make the new contents durable before the rename can point at them,
+            # or a power loss may leave an empty servers.json behind
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, SERVERS_FILE)
+    except:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    # what we just wrote is what the next load_servers() would parse
+    _remember_servers(_servers_file_key(), servers)
+
+KEYRING_SERVICE = "xficher-pro"
+
+def store_password(s, password):
+    """
+    Keep a server's password in the system keyring when one is usable (the record
+    then only holds a password_ref); otherwise inline as before. Returns s.
+    """
+    if HAS_KEYRING:
+        ref = s.get("password_ref") or f"{s.get('username')}@{s.get('server_url')}#{s.get('created_at')}"
+        try:
+            keyring.set_password(KEYRING_SERVICE, ref, password)
+            s["password_ref"] = ref
+            s.pop("password", None)
+            return s
+        except Exception:
+            # no backend (e.g. plain Termux): fall back to inline storage
+            pass
+    s["password"] = password
+    return s
+
+def server_password(s):
+    """The password of a server record, from the keyring or inline."""
+    if s.get("password_ref") and HAS_KEYRING:
+        try:
+            password = keyring.get_password(KEYRING_SERVICE, s["password_ref"])
+            if password is not None:
+                return password
+        except Exception:
+            pass
+    return s.get("password")
+
+def forget_password(s):
+    if s.get("password_ref") and HAS_KEYRING:
+        try:
+            keyring.delete_password(KEYRING_SERVICE, s["password_ref"])
+        except Exception:
+            pass
+
+@functools.lru_cache(maxsize=1024)
+def _format_timestamp(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
 
 def timestamp_to_str(ts):
+    # menus redraw the same few timestamps over and over; cache by int seconds
     try:
-        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(ts)))
+        return _format_timestamp(int(ts))
     except:
         return str(ts)
 
@@ -118,7 +289,19 @@ def prompt_server_index(servers, purpose="select"):
 
 # --------- Networking helpers (robust) ----------
 DEFAULT_TIMEOUT = 20
+PROBE_WORKERS = 8
+PROBE_TIMEOUT = 3
+# plain TCP connect check run before the HEAD probe
+TCP_PREFLIGHT_TIMEOUT = 1.0
+# bytes per iter_content() chunk for playlist downloads
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+REFRESH_WORKERS = 16
+# one urllib3 pool per scheme://host:port; a refresh touches ~12 candidates per server
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 64
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114 Safari/537.36"
+# every content-coding urllib3 can decode here (gzip, deflate, plus br when `brotli` is installed)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
 
 # Generate candidate endpoints to try
 def generate_endpoints(base_server):
@@ -162,286 +345,627 @@ def generate_endpoints(base_server):
             uniq.append(u)
     return uniq
 
-def save_debug_response(server_name, endpoint, response_text):
+# cap on saved debug bodies to avoid huge files
+DEBUG_MAX_BYTES = 500000
+
+def save_debug_response(server_name, endpoint, response):
+    """
+    response: decoded text, or a requests Response whose body is streamed into
+    the file chunk by chunk; either way at most DEBUG_MAX_BYTES of it are kept,
+    so a huge error page is never read into memory whole.
+    """
     ensure_dirs()
-    fname = f"{int(time.time())}_{server_name}_debug.txt".replace(" ", "_")
-    path = os.path.join(DEBUG_DIR, fname)
     try:
-        with open(path, "w", encoding="utf-8", errors="replace") as f:
-            f.write(f"Endpoint: {endpoint}\n\n")
-            f.write(response_text[:500000])  # cap to avoid huge files
+        u = urlsplit(endpoint)
+        origin = f"{u.hostname}_{u.port or u.scheme}" if u.hostname else "unknown"
+    except Exception:
+        origin = "unknown"
+    # concurrent probes fail within the same second: mkstemp makes every
+    # snapshot its own file instead of several threads sharing one path
+    prefix = f"{int(time.time())}_{server_name}_{origin}_".replace(" ", "_")
+    try:
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix="_debug.txt", dir=DEBUG_DIR)
+    except Exception as e:
+        print(C.R + f"Failed to write debug file: {e}" + C.RESET)
+        return None
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(f"Endpoint: {endpoint}\n\n".encode("utf-8"))
+            if isinstance(response, str):
+                f.write(response[:DEBUG_MAX_BYTES].encode("utf-8", errors="replace"))
+            else:
+                remaining = DEBUG_MAX_BYTES
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk[:remaining])
+                    remaining -= len(chunk)
+                    if remaining <= 0:
+                        break
     except Exception as e:
         print(C.R + f"Failed to write debug file: {e}" + C.RESET)
         return None
     return path
 
-def request_with_client(endpoint, timeout=DEFAULT_TIMEOUT, stream=False):
+# Shared HTTP clients: one pooled session (and a pool of cloudscrapers) reused for every
+# request so repeated endpoint probes keep their TCP/TLS connections alive.
+def build_session(retries=True):
+    # only retry on gateway errors; dead candidate ports should fail fast. A 503's
+    # Retry-After (maintenance / Cloudflare pages) is ignored: urllib3 would sleep
+    # for up to 6 h before each retry.
+    retry = Retry(total=2, connect=0, read=0, backoff_factor=0.3,
+                  status_forcelist=[502, 503, 504], raise_on_status=False,
+                  respect_retry_after_header=False) if retries else 0
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+_SESSION = build_session()
+# HEAD probes only ask "is anything there?": any status will do, so never retry
+_PROBE_SESSION = build_session(retries=False)
+_SCRAPERS = queue.Queue()
+_SCRAPER_FAILED = False
+
+def get_scraper():
+    """
+    Check an idle cloudscraper instance out of the shared pool, creating one only
+    when all are busy (playlist-only sessions never pay for it). CloudScraper keeps
+    per-request challenge state on the session, so each one serves a single thread
+    at a time; hand it back with release_scraper() so later requests, on any
+    thread, reuse it and its keep-alive connections.
+    Returns None when cloudscraper is missing or could not be set up.
+    """
+    global _SCRAPER_FAILED
+    if not HAS_CLOUDSCRAPER or _SCRAPER_FAILED:
+        return None
+    try:
+        return _SCRAPERS.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        # keep cloudscraper's own TLS adapter
+        return cloudscraper.create_scraper(browser={'custom': USER_AGENT})
+    except Exception:
+        # remember the failure instead of retrying on every request
+        _SCRAPER_FAILED = True
+        return None
+
+def release_scraper(scraper):
+    _SCRAPERS.put(scraper)
+
+def request_with_client(endpoint, timeout=DEFAULT_TIMEOUT, stream=False, headers=None, client=None):
     """
     Use cloudscraper if available (Cloudflare bypass), else requests.
     Returns tuple (response_obj_or_exception, used_client_name)
     stream: if True, request with stream=True to allow iter_content
+    headers: extra request headers (e.g. from conditional_headers)
+    client: the server's saved last_client; anything but "cloudscraper" means plain
+    HTTP worked last time, so the slower cloudscraper attempt is skipped
     """
-    headers = {"User-Agent": USER_AGENT}
-    if HAS_CLOUDSCRAPER:
+    scraper = get_scraper() if client in (None, "cloudscraper") else None
+    if scraper is not None:
         try:
-            scr = cloudscraper.create_scraper(browser={'custom': USER_AGENT})
-            r = scr.get(endpoint, timeout=timeout, headers=headers, allow_redirects=True, stream=stream)
+            r = scraper.get(endpoint, timeout=timeout, allow_redirects=True, stream=stream, headers=headers)
             return (r, "cloudscraper")
         except Exception:
             # fallback to requests
             pass
+        finally:
+            release_scraper(scraper)
     try:
-        r = requests.get(endpoint, timeout=timeout, headers=headers, allow_redirects=True, stream=stream)
+        r = _SESSION.get(endpoint, timeout=timeout, allow_redirects=True, stream=stream, headers=headers)
         return (r, "requests")
     except Exception as e:
         return (e, "requests")
 
+def conditional_headers(etag=None, last_modified=None):
+    """If-None-Match / If-Modified-Since headers for a saved ETag / Last-Modified; None if neither."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers or None
+
+def _validators(resp):
+    return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+def _keep_validators(res, etag, last_modified):
+    # a 304 may omit ETag / Last-Modified; the ones we sent still describe the cached copy
+    if res.get("not_modified"):
+        res["etag"] = res.get("etag") or etag
+        res["last_modified"] = res.get("last_modified") or last_modified
+    return res
+
+def _close_future_response(fut):
+    try:
+        resp, _ = fut.result()
+        resp.close()
+    except Exception:
+        pass
+
+def race_endpoints(urls, timeout=DEFAULT_TIMEOUT, stream=False):
+    """
+    Fire request_with_client at every url concurrently and yield
+    (url, response_obj_or_exception, used_client_name) as each one finishes.
+    Stop iterating once a usable response is found: requests still queued are
+    cancelled and responses arriving later are closed.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(urls), PROBE_WORKERS)))
+    futs = {pool.submit(request_with_client, u, timeout, stream): u for u in urls}
+    handed_out = set()
+    try:
+        for fut in as_completed(futs):
+            handed_out.add(fut)
+            resp, client = fut.result()
+            yield futs[fut], resp, client
+    finally:
+        for fut in futs:
+            if fut not in handed_out:
+                fut.cancel()
+                fut.add_done_callback(_close_future_response)
+        pool.shutdown(wait=False)
+
+def _probe(base, timeout=PROBE_TIMEOUT):
+    # any HTTP answer counts as alive (404s and Cloudflare 403/503 pages included);
+    # only refused / timed-out / TLS-failing candidates are dropped
+    try:
+        _PROBE_SESSION.head(base + "/player_api.php", timeout=timeout, allow_redirects=True).close()
+        return True
+    except Exception:
+        return False
+
+def _host_port(base):
+    u = urlsplit(base)
+    return (u.hostname, u.port or (443 if u.scheme == "https" else 80))
+
+def _tcp_open(addr, timeout=TCP_PREFLIGHT_TIMEOUT):
+    try:
+        socket.create_connection(addr, timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+def _proxied(url):
+    # requests (trust_env) sends this url through an environment proxy, so a
+    # direct TCP connect says nothing about whether it is reachable
+    try:
+        return bool(requests.utils.get_environ_proxies(url))
+    except Exception:
+        return False
+
+def reachable_endpoints(endpoints):
+    """
+    Drop base URLs whose host:port refuses or ignores a TCP connect. Candidates
+    sharing a host:port (http://h and http://h:80, https://h:80 ...) are checked
+    once; candidates going through an environment proxy are kept unchecked.
+    Keeps order; may return an empty list.
+    """
+    addrs = {}
+    for e in endpoints:
+        if _proxied(e):
+            continue
+        try:
+            addrs.setdefault(_host_port(e))
+        except ValueError:
+            pass
+    if not addrs:
+        return endpoints
+    with ThreadPoolExecutor(max_workers=min(len(addrs), PROBE_WORKERS)) as pool:
+        is_open = dict(zip(addrs, pool.map(_tcp_open, addrs)))
+    kept = []
+    for e in endpoints:
+        try:
+            if not _proxied(e) and not is_open.get(_host_port(e), True):
+                continue
+        except ValueError:
+            pass
+        kept.append(e)
+    return kept
+
+def live_endpoints(endpoints, verbose=False):
+    """
+    Cull candidate base URLs with a TCP preflight and then a quick concurrent
+    HEAD request before the full GETs pay DEFAULT_TIMEOUT. Keeps order; if
+    nothing answered, only candidates behind an environment proxy (which may
+    mishandle HEAD) are kept, so a dead server yields an empty list.
+    """
+    if not endpoints:
+        return endpoints
+    endpoints = reachable_endpoints(endpoints)
+    if not endpoints:
+        if verbose:
+            print(C.R + "  No candidate endpoint accepted a connection." + C.RESET)
+        return endpoints
+    with ThreadPoolExecutor(max_workers=min(len(endpoints), PROBE_WORKERS)) as pool:
+        alive = list(pool.map(_probe, endpoints))
+    live = [e for e, ok in zip(endpoints, alive) if ok]
+    if verbose:
+        print(C.C + f"  {len(live)}/{len(endpoints)} candidate endpoints answered the probe." + C.RESET)
+    return live or [e for e in endpoints if _proxied(e)]
+
+def endpoint_base(endpoint):
+    """
+    Base URL (scheme://host[:port][/path]) of a player_api.php / get.php endpoint,
+    or of a saved last_endpoint (stored as that base already); None if not
+    recognisable.
+    """
+    if not endpoint:
+        return None
+    for marker in ("/player_api.php", "/get.php"):
+        if marker in endpoint:
+            return endpoint.split(marker, 1)[0]
+    if endpoint.startswith(("http://", "https://")) and "?" not in endpoint:
+        return endpoint.rstrip("/")
+    return None
+
+def _remaining_endpoints(server_url, skip_base, verbose):
+    endpoints = [e for e in generate_endpoints(server_url) if e != skip_base]
+    return live_endpoints(endpoints, verbose=verbose)
+
+def _player_api_result(api_url, resp, client, verbose):
+    """Check one player_api response; returns the success dict or None."""
+    # if exception returned
+    if isinstance(resp, Exception):
+        if verbose:
+            print(C.R + f"  Error ({client}) {api_url}: {resp}" + C.RESET)
+        return None
+    # if response got but non-200
+    status = getattr(resp, "status_code", None)
+    if status == 304:
+        # answer to a conditional request: the saved user_info/server_info still hold
+        if verbose:
+            print(C.G + f"  Not modified since last refresh: {api_url}" + C.RESET)
+        return {"ok": True, "endpoint": api_url, "client": client, "data": None, "not_modified": True, **_validators(resp)}
+    if status != 200:
+        if verbose:
+            print(C.R + f"  HTTP status {status} from {client}: {api_url}" + C.RESET)
+        # save snippet for debugging
+        try:
+            path = save_debug_response("player_api_non200", api_url, resp)
+            if verbose and path:
+                print(C.C + f"  Saved debug to: {path}" + C.RESET)
+        except:
+            pass
+        return None
+    # status 200 -> try parse JSON
+    try:
+        data = resp.json()
+        # good JSON; return
+        return {"ok": True, "endpoint": api_url, "client": client, "data": data, **_validators(resp)}
+    except Exception as e:
+        # save raw response for debugging
+        path = save_debug_response("player_api_badjson", api_url, resp)
+        if verbose:
+            print(C.R + f"  JSON parse failed ({api_url}): {e}. Saved raw to: {path}" + C.RESET)
+        return None
+
 # Robust fetch player_api with multiple endpoints
-def fetch_player_api_robust(server_url, username, password, timeout=DEFAULT_TIMEOUT, verbose=True):
-    endpoints = generate_endpoints(server_url)
+def fetch_player_api_robust(server_url, username, password, timeout=DEFAULT_TIMEOUT, verbose=True, last_endpoint=None, etag=None, last_modified=None, last_client=None):
+    """
+    last_endpoint: the server's saved last_endpoint; its base is tried alone first
+    (with last_client) and the candidate probe/race only runs if it no longer works.
+    etag / last_modified: validators saved from that endpoint's last answer; sent as
+    a conditional request, a 304 comes back as ok with data=None and not_modified=True.
+    """
     tried = []
-    for base in endpoints:
-        api_url = f"{base}/player_api.php?username={username}&password={password}"
+    last_base = endpoint_base(last_endpoint)
+    if last_base:
+        api_url = f"{last_base}/player_api.php?username={username}&password={password}"
         if verbose:
+            print(C.Y + "Trying last working endpoint:" + C.RESET, api_url)
+        # connect with the short probe timeout: a saved host that went dark should
+        # hand over to the candidate race quickly, not after the full timeout
+        resp, client = request_with_client(api_url, timeout=(PROBE_TIMEOUT, timeout), headers=conditional_headers(etag, last_modified), client=last_client)
+        tried.append((api_url, resp, client))
+        res = _player_api_result(api_url, resp, client, verbose)
+        if res:
+            return _keep_validators(res, etag, last_modified)
+    endpoints = _remaining_endpoints(server_url, last_base, verbose)
+    api_urls = [f"{base}/player_api.php?username={username}&password={password}" for base in endpoints]
+    if verbose:
+        for api_url in api_urls:
             print(C.Y + "Trying endpoint:" + C.RESET, api_url)
-        resp, client = request_with_client(api_url, timeout=timeout)
+    # all candidates are probed at once; the first good JSON answer wins
+    for api_url, resp, client in race_endpoints(api_urls, timeout=timeout):
         tried.append((api_url, resp, client))
-        # if exception returned
-        if isinstance(resp, Exception):
-            if verbose:
-                print(C.R + f"  Error ({client}): {resp}" + C.RESET)
-            continue
-        # if response got but non-200
-        status = getattr(resp, "status_code", None)
-        if status != 200:
-            if verbose:
-                print(C.R + f"  HTTP status {status} from {client}" + C.RESET)
-            # save snippet for debugging
-            try:
-                snippet = resp.text[:1000]
-                path = save_debug_response("player_api_non200", api_url, resp.text)
-                if verbose and path:
-                    print(C.C + f"  Saved debug to: {path}" + C.RESET)
-            except:
-                pass
-            continue
-        # status 200 -> try parse JSON
-        text = resp.text or ""
-        try:
-            data = resp.json()
-            # good JSON; return
-            return {"ok": True, "endpoint": api_url, "client": client, "data": data}
-        except Exception as e:
-            # save raw response for debugging
-            path = save_debug_response("player_api_badjson", api_url, text)
-            if verbose:
-                print(C.R + f"  JSON parse failed: {e}. Saved raw to: {path}" + C.RESET)
-            # still continue to next endpoint
-            continue
+        res = _player_api_result(api_url, resp, client, verbose)
+        if res:
+            return res
     # if reached here, nothing succeeded
     return {"ok": False, "tried": tried}
 
-# Robust playlist fetch (m3u) with progress (uses print_progress_bar)
-def fetch_playlist_robust(server_url, username, password, m3u_type="m3u_plus", timeout=DEFAULT_TIMEOUT, verbose=True):
-    endpoints = generate_endpoints(server_url)
-    for base in endpoints:
-        pl_url = f"{base}/get.php?username={username}&password={password}&type={m3u_type}"
+def _download_playlist(pl_url, resp, client, out_path, verbose):
+    """
+    Check one streamed get.php response and, if it is an M3U, download it to
+    out_path via a .part file. Returns the success dict or None.
+    """
+    # handle exceptions
+    if isinstance(resp, Exception):
         if verbose:
-            print(C.Y + "Trying playlist endpoint:" + C.RESET, pl_url)
-        resp, client = request_with_client(pl_url, timeout=timeout, stream=True)
-        # handle exceptions
-        if isinstance(resp, Exception):
-            if verbose:
-                print(C.R + f"  Error ({client}): {resp}" + C.RESET)
-            continue
-        status = getattr(resp, "status_code", None)
-        if status != 200:
-            if verbose:
-                print(C.R + f"  HTTP status {status}" + C.RESET)
-            try:
-                text_snip = resp.text
-                save_debug_response("playlist_non200", pl_url, text_snip)
-            except:
-                pass
-            try:
-                resp.close()
-            except:
-                pass
-            continue
+            print(C.R + f"  Error ({client}) {pl_url}: {resp}" + C.RESET)
+        return None
+    status = getattr(resp, "status_code", None)
+    if status == 304 and os.path.exists(out_path):
+        # conditional request: the playlist already on disk is current
+        resp.close()
+        if verbose:
+            print(C.G + "  Playlist not modified; keeping the saved copy." + C.RESET)
+        return {"ok": True, "endpoint": pl_url, "client": client, "path": out_path, "not_modified": True, **_validators(resp)}
+    if status != 200:
+        if verbose:
+            print(C.R + f"  HTTP status {status}: {pl_url}" + C.RESET)
+        try:
+            save_debug_response("playlist_non200", pl_url, resp)
+        except:
+            pass
+        try:
+            resp.close()
+        except:
+            pass
+        return None
 
-        # Stream the response and show progress
+    # Stream the response to disk and show progress
+    part_path = out_path + ".part"
+    try:
+        total = 0
         try:
+            total = int(resp.headers.get('Content-Length') or 0)
+        except:
             total = 0
-            try:
-                total = int(resp.headers.get('Content-Length') or 0)
-            except:
-                total = 0
-            downloaded = 0
-            chunks = []
-            if verbose:
-                if total:
-                    print(C.C + f"  Content-Length: {total} bytes. Starting download..." + C.RESET)
-                else:
-                    print(C.C + "  Content-Length unknown. Starting download..." + C.RESET)
-            for chunk in resp.iter_content(chunk_size=8192):
+        downloaded = 0
+        last_print = 0.0
+        head = b""
+        # Content-Length counts bytes on the wire, which are compressed when the
+        # server applied Content-Encoding; track progress against raw bytes read
+        encoded = resp.headers.get('Content-Encoding')
+        raw_tell = getattr(resp.raw, "tell", None)
+        if verbose:
+            if total:
+                print(C.C + f"  Content-Length: {total} bytes{f' ({encoded})' if encoded else ''}. Starting download..." + C.RESET)
+            else:
+                print(C.C + "  Content-Length unknown. Starting download..." + C.RESET)
+        with open(part_path, "wb") as fh:
+            for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                 if not chunk:
                     continue
-                chunks.append(chunk)
+                fh.write(chunk)
+                # keep the first KB around for the M3U signature check
+                if len(head) < 1024:
+                    head += chunk[:1024 - len(head)]
                 downloaded += len(chunk)
                 if verbose:
+                    # redraw at most every PROGRESS_INTERVAL, not once per chunk
+                    now = time.monotonic()
+                    if now - last_print <= PROGRESS_INTERVAL:
+                        continue
+                    last_print = now
                     if total:
-                        print_progress_bar(downloaded, total, prefix="  Downloading", length=40)
+                        received = raw_tell() if raw_tell else downloaded
+                        # the completed bar (and its newline) is drawn once after the loop
+                        if received < total:
+                            print_progress_bar(received, total, prefix="  Downloading", length=40)
                     else:
                         print_progress_bar(downloaded, None, prefix="  Downloading", length=20)
-            if verbose and total:
-                # ensure finished bar printed
-                print_progress_bar(downloaded, total, prefix="  Downloading", length=40)
-            if verbose and not total:
-                sys.stdout.write("\n")
-                sys.stdout.flush()
-            # join and decode using response encoding
-            raw = b"".join(chunks)
-            encoding = getattr(resp, "encoding", None) or "utf-8"
-            try:
-                text = raw.decode(encoding, errors="replace")
-            except:
-                text = raw.decode("utf-8", errors="replace")
-            # close response
-            try:
-                resp.close()
-            except:
-                pass
+        if verbose and total:
+            # ensure finished bar printed
+            print_progress_bar(total, total, prefix="  Downloading", length=40)
+        if verbose and not total:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+        # close response
+        try:
+            resp.close()
+        except:
+            pass
 
-            # Validate M3U signature
-            if "#EXTM3U" in text.upper():
-                return {"ok": True, "endpoint": pl_url, "client": client, "text": text}
-            else:
-                # not a valid M3U but still save to debug
-                path = save_debug_response("playlist_nonm3u", pl_url, text)
-                if verbose:
-                    print(C.Y + "  Response not M3U. Saved raw for debugging:", path)
-                continue
-        except Exception as e:
-            # save debugging info
-            try:
-                resp_text = resp.text if hasattr(resp, "text") else ""
-                path = save_debug_response("playlist_error", pl_url, resp_text or str(e))
-                if verbose:
-                    print(C.R + f"  Error while streaming: {e}. Saved debug: {path}" + C.RESET)
-            except Exception:
-                if verbose:
-                    print(C.R + f"  Error while streaming: {e}" + C.RESET)
-            try:
-                resp.close()
-            except:
-                pass
-            continue
+        # Validate M3U signature
+        if b"#EXTM3U" in head.upper():
+            os.replace(part_path, out_path)
+            return {"ok": True, "endpoint": pl_url, "client": client, "path": out_path, **_validators(resp)}
+        else:
+            # not a valid M3U but still save to debug
+            with open(part_path, "r", encoding="utf-8", errors="replace") as fh:
+                path = save_debug_response("playlist_nonm3u", pl_url, fh.read(DEBUG_MAX_BYTES))
+            os.remove(part_path)
+            if verbose:
+                print(C.Y + "  Response not M3U. Saved raw for debugging:", path)
+            return None
+    except Exception as e:
+        # save debugging info (the body was already partly consumed into the .part file)
+        try:
+            path = save_debug_response("playlist_error", pl_url, str(e))
+            if verbose:
+                print(C.R + f"  Error while streaming: {e}. Saved debug: {path}" + C.RESET)
+        except Exception:
+            if verbose:
+                print(C.R + f"  Error while streaming: {e}" + C.RESET)
+        try:
+            resp.close()
+        except:
+            pass
+        try:
+            os.remove(part_path)
+        except:
+            pass
+        return None
+
+# Robust playlist fetch (m3u) with progress (uses print_progress_bar)
+def fetch_playlist_robust(server_url, username, password, out_path, m3u_type="m3u_plus", timeout=DEFAULT_TIMEOUT, verbose=True, last_endpoint=None, etag=None, last_modified=None, last_client=None):
+    """
+    The playlist body is streamed straight to out_path (via a .part file) instead
+    of being buffered in memory. Returns dict with ok/endpoint/client/path.
+    last_endpoint: the server's saved last_endpoint; its base is tried alone first
+    (with last_client).
+    etag / last_modified: validators of the playlist already at out_path; a 304
+    keeps that file and the result carries not_modified=True.
+    """
+    last_base = endpoint_base(last_endpoint)
+    if last_base:
+        pl_url = f"{last_base}/get.php?username={username}&password={password}&type={m3u_type}"
+        if verbose:
+            print(C.Y + "Trying last working playlist endpoint:" + C.RESET, pl_url)
+        # validators only describe the file we still have
+        headers = conditional_headers(etag, last_modified) if os.path.exists(out_path) else None
+        # short connect timeout, as in fetch_player_api_robust
+        resp, client = request_with_client(pl_url, timeout=(PROBE_TIMEOUT, timeout), stream=True, headers=headers, client=last_client)
+        res = _download_playlist(pl_url, resp, client, out_path, verbose)
+        if res:
+            return _keep_validators(res, etag, last_modified)
+    endpoints = _remaining_endpoints(server_url, last_base, verbose)
+    pl_urls = [f"{base}/get.php?username={username}&password={password}&type={m3u_type}" for base in endpoints]
+    if verbose:
+        for pl_url in pl_urls:
+            print(C.Y + "Trying playlist endpoint:" + C.RESET, pl_url)
+    # streamed requests return once headers arrive, so the race only picks the
+    # working base. The race is closed (cancelling/closing every other response)
+    # before the winner's body is downloaded, so no loser stays open on the
+    # account meanwhile; if that body is not an M3U the rest are raced again.
+    remaining = list(pl_urls)
+    while remaining:
+        race = race_endpoints(remaining, timeout=timeout, stream=True)
+        winner = None
+        try:
+            for pl_url, resp, client in race:
+                remaining.remove(pl_url)
+                if not isinstance(resp, Exception) and getattr(resp, "status_code", None) == 200:
+                    winner = (pl_url, resp, client)
+                    break
+                # errors / non-200: report and save debug like any failed candidate
+                _download_playlist(pl_url, resp, client, out_path, verbose)
+        finally:
+            race.close()
+        if winner is None:
+            break
+        res = _download_playlist(*winner, out_path, verbose)
+        if res:
+            return res
     return {"ok": False}
 
 # --------- M3U parsing / JSON / Filter / Rebuild ----------
-def parse_m3u_to_json(m3u_text, verbose=False):
+_EXTINF_LINE_RE = re.compile(r'#EXTINF:?([-0-9]*)([^,]*),?(.*)', re.IGNORECASE)
+# findall of this precompiled pattern runs in C and beat hand-rolled str.find /
+# str.split tokenizers on typical Xtream headers, so it stays the attribute parser.
+# hyperscan's per-match Python callbacks were slower still on ~100 byte headers.
+_ATTR_RE = re.compile(r'([\w\-]+)="([^"]*)"')
+
+def _attrs_from_header(header):
+    # attribute names and group names repeat on every channel: interning them
+    # lets a large playlist share one string object each instead of one per channel
+    return {sys.intern(k): (sys.intern(v) if k == "group-title" else v)
+            for k, v in _ATTR_RE.findall(header)}
+
+def iter_parse_m3u(lines):
     """
-    Parse an M3U (EXTM3U) playlist into a list of channel dicts.
-    Each channel dict contains:
+    Parse an M3U (EXTM3U) playlist from any iterable of lines (an open file,
+    resp.iter_lines(...)) and yield channel dicts one at a time, so a whole
+    playlist never has to sit in memory. Each channel dict contains:
       - title
       - duration
       - attrs: dict of attributes (tvg-id, tvg-name, tvg-logo, group-title, etc.)
       - url
       - raw_extinf (original extinf line)
-    If verbose=True, shows a simple progress indicator while collecting channels.
-    """
-    lines = [ln.rstrip("\n") for ln in m3u_text.splitlines()]
-    channels = []
-    i = 0
-    estimated_total_lines = len(lines) or 1
-    processed = 0
-    while i < len(lines):
-        ln = lines[i].strip()
-        processed += 1
-        if verbose and (processed % 50 == 0 or processed == estimated_total_lines):
-            # update a rough progress by lines processed (not exact channels yet)
-            print_progress_bar(processed, estimated_total_lines, prefix="  Parsing lines", length=30)
+    """
+    pending = None
+    for ln in lines:
+        ln = ln.strip()
         if not ln:
-            i += 1
             continue
-        if ln.upper().startswith("#EXTINF"):
-            raw_extinf = ln
-            # try to extract duration and attributes and title
-            parts = ln.split(",", 1)
-            if len(parts) == 2:
-                header, title = parts[0], parts[1].strip()
-            else:
-                header, title = parts[0], ""
-            dur_match = re.match(r'#EXTINF:([-0-9]+)', header, re.IGNORECASE)
-            duration = dur_match.group(1) if dur_match else ""
-            attrs = dict(re.findall(r'([a-zA-Z0-9\-_]+?)="(.*?)"', header))
-            # Next non-empty non-comment line should be URL
-            url = ""
-            j = i + 1
-            while j < len(lines):
-                candidate = lines[j].strip()
-                if candidate == "" or candidate.startswith("#"):
-                    j += 1
-                    continue
-                url = candidate
-                break
-            channel = {
-                "title": title,
-                "duration": duration,
-                "attrs": attrs,
-                "url": url,
-                "raw_extinf": raw_extinf
-            }
-            channels.append(channel)
-            # move i to j+1
-            i = j + 1
+        if ln.startswith("#"):
+            # comment lines between an #EXTINF and its URL are skipped
+            if pending is None and ln[:7].upper() == "#EXTINF":
+                pending = ln
             continue
-        else:
-            i += 1
-    if verbose:
-        # finish progress line if needed
-        print_progress_bar(estimated_total_lines, estimated_total_lines, prefix="  Parsing lines", length=30)
-        print(C.G + f"  Parsed {len(channels)} channels." + C.RESET)
-    return channels
+        if pending is not None:
+            yield _channel_from_extinf(pending, ln)
+            pending = None
+    if pending is not None:
+        yield _channel_from_extinf(pending, "")
+
+def _channel_from_extinf(raw_extinf, url):
+    m = _EXTINF_LINE_RE.match(raw_extinf)
+    duration, header, title = m.groups()
+    return {
+        "title": title.strip(),
+        "duration": sys.intern(duration),
+        "attrs": _attrs_from_header(header),
+        "url": url,
+        "raw_extinf": raw_extinf
+    }
+
+def write_channels_json(path, channels):
+    """
+    Write channels as a pretty JSON array in a few bulk-dumped batches so we can
+    show progress. channels may be a list or any iterable (e.g. iter_parse_m3u).
+    Returns the number of channels written; I/O errors propagate.
+    """
+    # generators have no len(): fall back to fixed-size batches and a running count
+    total = len(channels) if hasattr(channels, "__len__") else None
+    batch_size = max(1, -(-total // 10)) if total else JSON_BATCH_SIZE
+    count = 0
+    it = iter(channels)
+    with open(path, "wb", buffering=1 << 20) as fh:
+        fh.write(b"[")
+        while True:
+            batch = list(islice(it, batch_size))
+            if not batch:
+                break
+            # one dump per batch; strip its "[\n" ... "\n]" so batches stitch into one array
+            fh.write(b",\n" if count else b"\n")
+            fh.write(json_dumps_bytes(batch)[2:-2])
+            count += len(batch)
+            print_progress_bar(count, total, prefix="  Saving JSON", length=40, unit="channels")
+        fh.write(b"\n]\n")
+    if total is None:
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    return count
 
 def save_playlist_json(safe_name, username, channels):
     """
-    Stream-write JSON file per-channel so we can show progress.
-    Produces pretty formatted JSON with each item indented.
+    Save a parsed playlist as OUTPUT_DIR/<safe_name>_<username>_playlist.json.
+    Returns (path, count) where path is None on failure.
     """
     ensure_dirs()
     fname = f"{safe_name}_{username}_playlist.json"
     path = os.path.join(OUTPUT_DIR, fname)
     try:
-        total = len(channels) if channels else 0
-        with open(path, "w", encoding="utf-8") as fh:
-            fh.write("[\n")
-            for idx, ch in enumerate(channels):
-                # dump each channel with indent 2
-                dumped = json.dumps(ch, ensure_ascii=False, indent=2)
-                # add indentation to lines to maintain array formatting
-                indented = "\n".join(["  " + line for line in dumped.splitlines()])
-                fh.write(indented)
-                if idx < total - 1:
-                    fh.write(",\n")
-                else:
-                    fh.write("\n")
-                # update progress
-                print_progress_bar(idx + 1, total, prefix="  Saving JSON", length=40)
-            fh.write("]\n")
-        return path
+        return path, write_channels_json(path, channels)
     except Exception as e:
         print(C.R + f"Failed to save JSON playlist: {e}" + C.RESET)
-        return None
+        return None, 0
+
+@functools.lru_cache(maxsize=8)
+def _load_playlist_cached(path, mtime_ns):
+    with open(path, "rb") as fh:
+        return json_loads(fh.read())
 
 def load_playlist_json(path):
+    """
+    Load a parsed JSON playlist. Results are cached per (path, mtime) so repeated
+    menu visits on the same file skip re-parsing; treat the returned list as read-only.
+    """
     try:
-        with open(path, "r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return _load_playlist_cached(path, os.stat(path).st_mtime_ns)
     except Exception as e:
         print(C.R + f"Failed to load JSON: {e}" + C.RESET)
         return None
 
+def iter_playlist_json(path):
+    """
+    Yield channels from a parsed JSON playlist one at a time. With ijson only the
+    items consumed so far are ever decoded, so taking a few samples from a huge
+    file stays cheap; without it this falls back to load_playlist_json.
+    """
+    if HAS_IJSON:
+        with open(path, "rb") as fh:
+            yield from ijson.items(fh, "item")
+    else:
+        yield from load_playlist_json(path) or []
+
 def build_extinf_line(entry):
     # entry: dict with duration, attrs, title
     dur = entry.get("duration", "-1")
@@ -459,17 +983,17 @@ def build_extinf_line(entry):
 
 def create_m3u_from_channels(channels, out_path):
     """
-    Build M3U by iterating channels and show a progress bar.
+    Build M3U with one writelines() per batch of channels into a 1 MiB buffered
+    file, showing a progress bar after each batch.
     """
     try:
         total = len(channels) if channels else 0
-        with open(out_path, "w", encoding="utf-8") as fh:
+        with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as fh:
             fh.write("#EXTM3U\n")
-            for idx, ch in enumerate(channels):
-                ext = build_extinf_line(ch)
-                fh.write(ext + "\n")
-                fh.write((ch.get("url") or "") + "\n")
-                print_progress_bar(idx + 1, total, prefix="  Building M3U", length=40)
+            for start in range(0, total, M3U_BATCH_SIZE):
+                batch = channels[start:start + M3U_BATCH_SIZE]
+                fh.writelines(f"{build_extinf_line(ch)}\n{ch.get('url') or ''}\n" for ch in batch)
+                print_progress_bar(start + len(batch), total, prefix="  Building M3U", length=40)
         return True
     except Exception as e:
         print(C.R + f"Failed to write M3U: {e}" + C.RESET)
@@ -477,39 +1001,53 @@ def create_m3u_from_channels(channels, out_path):
 
 def list_output_playlists():
     ensure_dirs()
-    files = sorted(os.listdir(OUTPUT_DIR))
+    with os.scandir(OUTPUT_DIR) as it:
+        files = sorted(e.name for e in it if e.is_file())
     m3us = [f for f in files if f.lower().endswith(".m3u")]
     jsons = [f for f in files if f.lower().endswith(".json")]
     return m3us, jsons
 
-def filter_channels(channels, field, keyword):
+# search field lookup shared by playlist_column() and the uncached filter path
+def _field_value(ch, field):
+    if field == "title":
+        return ch.get("title") or ""
+    attrs = ch.get("attrs") or {}
+    return attrs.get("group-title" if field == "group" else field, "") or ""
+
+@functools.lru_cache(maxsize=32)
+def _playlist_column_cached(path, mtime_ns, field):
+    channels = _load_playlist_cached(path, mtime_ns)
+    return [_field_value(ch, field).lower() for ch in channels]
+
+def playlist_column(path, field):
+    """
+    Lower-cased values of one search field for every channel of a JSON playlist.
+    Built the first time that field is filtered on and cached per file version
+    like load_playlist_json. Returns None on error.
+    """
+    try:
+        return _playlist_column_cached(path, os.stat(path).st_mtime_ns, field)
+    except Exception:
+        return None
+
+def filter_channels(channels, field, keyword, column=None):
     """
     field: 'title', 'group', 'tvg-name', 'tvg-id', etc.
     keyword: substring (case-insensitive)
+    column: optional playlist_column() of the same channels/field to skip re-lowercasing
     Returns filtered list.
     """
     if not keyword:
         return channels[:]
     kw = keyword.strip().lower()
-    out = []
-    for ch in channels:
-        if field == "title":
-            if kw in (ch.get("title") or "").lower():
-                out.append(ch)
-        elif field == "group":
-            grp = (ch.get("attrs") or {}).get("group-title", "")
-            if kw in grp.lower():
-                out.append(ch)
-        else:
-            val = (ch.get("attrs") or {}).get(field, "")
-            if kw in val.lower():
-                out.append(ch)
-    return out
+    if column is not None and len(column) == len(channels):
+        return [ch for ch, val in zip(channels, column) if kw in val]
+    return [ch for ch in channels if kw in _field_value(ch, field).lower()]
 
 # --------- Core Features (same interface as before) ----------
 def add_server():
     clear()
-    print(C.B + C.C + "➕ Add a  new Server" + C.RESET)
+    print(f"{BC}➕ Add a  new Server{RST}")
     name = input("Name (label): ").strip()
     server_url = input("Server URL (e.g., example.com or http://example.com:8080): ").strip()
     username = input("Username: ").strip()
@@ -518,7 +1056,6 @@ def add_server():
         "name": name or server_url,
         "server_url": server_url,
         "username": username,
-        "password": password,
         "created_at": int(time.time()),
         "last_check": None,
         "last_endpoint": None,
@@ -526,6 +1063,7 @@ def add_server():
         "user_info": {},
         "server_info": {}
     }
+    store_password(server, password)
     servers = load_servers()
     servers.append(server)
     save_servers(servers)
@@ -534,7 +1072,7 @@ def add_server():
 
 def view_servers():
     clear()
-    print(C.B + C.C + "📁 Saved Servers" + C.RESET)
+    print(f"{BC}📁 Saved Servers{RST}")
     servers = load_servers()
     if not servers:
         print(C.Y + "No servers saved yet." + C.RESET)
@@ -567,7 +1105,7 @@ def show_server_details(idx):
     servers = load_servers()
     s = servers[idx]
     clear()
-    print(C.B + C.C + f"🔎 Details — {s.get('name')}" + C.RESET)
+    print(f"{BC}🔎 Details — {s.get('name')}{RST}")
     print(f"URL: {s.get('server_url')}")
     print(f"Username: {s.get('username')}")
     print(f"Created: {timestamp_to_str(s.get('created_at'))}")
@@ -609,22 +1147,32 @@ def show_server_details(idx):
         show_debug_files()
     # else back to menu
 
+# per-server state tied to the account that last answered
+_ENDPOINT_STATE_KEYS = ("last_endpoint", "last_client", "etag", "last_modified",
+                        "playlist_etag", "playlist_last_modified")
+
 def edit_server(idx):
     servers = load_servers()
     s = servers[idx]
     clear()
-    print(C.B + C.C + f"✏️ Edit — {s.get('name')}" + C.RESET)
+    print(f"{BC}✏️ Edit — {s.get('name')}{RST}")
     name = input(f"Name [{s.get('name')}]: ").strip() or s.get('name')
     server_url = input(f"Server URL [{s.get('server_url')}]: ").strip() or s.get('server_url')
     username = input(f"Username [{s.get('username')}]: ").strip() or s.get('username')
     pwd_prompt = input("Change password? (y/N): ").strip().lower()
-    if pwd_prompt == "y":
-        password = getpass("New Password: ").strip() or s.get('password')
-    else:
-        password = s.get('password')
+    password = getpass("New Password: ").strip() if pwd_prompt == "y" else ""
+    changed = (server_url != s.get('server_url') or username != s.get('username')
+               or (password and password != server_password(s)))
     s.update({
-        "name": name, "server_url": server_url, "username": username, "password": password
+        "name": name, "server_url": server_url, "username": username
     })
+    if password:
+        store_password(s, password)
+    if changed:
+        # the remembered endpoint/client and cache validators belong to the old
+        # account; drop them so the next fetch probes the new one from scratch
+        for key in _ENDPOINT_STATE_KEYS:
+            s[key] = None
     servers[idx] = s
     save_servers(servers)
     print(C.G + "✅ Updated." + C.RESET)
@@ -634,7 +1182,7 @@ def delete_server(idx):
     s = servers[idx]
     confirm = input(C.R + f"Are you sure delete '{s.get('name')}'? (y/N): " + C.RESET).strip().lower()
     if confirm == "y":
-        servers.pop(idx)
+        forget_password(servers.pop(idx))
         save_servers(servers)
         print(C.G + "Deleted." + C.RESET)
     else:
@@ -644,25 +1192,16 @@ def refresh_server(idx):
     servers = load_servers()
     s = servers[idx]
     clear()
-    print(C.B + C.C + f"🔁 Refreshing — {s.get('name')}" + C.RESET)
-    res = fetch_player_api_robust(s.get("server_url"), s.get("username"), s.get("password"), timeout=DEFAULT_TIMEOUT, verbose=True)
+    print(f"{BC}🔁 Refreshing — {s.get('name')}{RST}")
+    res = fetch_player_api_robust(s.get("server_url"), s.get("username"), server_password(s), timeout=DEFAULT_TIMEOUT, verbose=True,
+                                  last_endpoint=s.get("last_endpoint"), etag=s.get("etag"), last_modified=s.get("last_modified"),
+                                  last_client=s.get("last_client"))
+    servers[idx] = _apply_player_api(s, res)
     if not res.get("ok"):
         print(C.R + "❌ No valid player_api response found. See debug files." + C.RESET)
-        # save tried endpoints for reference
-        s["last_endpoint"] = None
-        s["last_client"] = None
-        s["last_check"] = int(time.time())
-        servers[idx] = s
         save_servers(servers)
         input("Press ENTER ...")
         return
-    data = res.get("data")
-    s["user_info"] = data.get("user_info", {}) or {}
-    s["server_info"] = data.get("server_info", {}) or {}
-    s["last_endpoint"] = res.get("endpoint")
-    s["last_client"] = res.get("client")
-    s["last_check"] = int(time.time())
-    servers[idx] = s
     save_servers(servers)
     print(C.G + "✅ Refreshed & saved." + C.RESET)
     input("Press ENTER ...")
@@ -671,33 +1210,116 @@ def fetch_and_save_playlist(idx):
     servers = load_servers()
     s = servers[idx]
     clear()
-    print(C.B + C.C + f"🎵 Fetch Playlist — {s.get('name')}" + C.RESET)
-    res = fetch_playlist_robust(s.get("server_url"), s.get("username"), s.get("password"), verbose=True)
+    print(f"{BC}🎵 Fetch Playlist — {s.get('name')}{RST}")
+    safe_name = s.get('name', 'server').replace(" ", "_")
+    fname = f"{safe_name}_{s.get('username')}_playlist.m3u"
+    path = os.path.join(OUTPUT_DIR, fname)
+    ensure_dirs()
+    res = fetch_playlist_robust(s.get("server_url"), s.get("username"), server_password(s), path, verbose=True, last_endpoint=s.get("last_endpoint"),
+                                etag=s.get("playlist_etag"), last_modified=s.get("playlist_last_modified"), last_client=s.get("last_client"))
     if not res.get("ok"):
         print(C.R + "❌ Failed to fetch a valid M3U playlist. Check debug files." + C.RESET)
         input("Press ENTER ...")
         return
-    text = res.get("text", "")
-    safe_name = s.get('name', 'server').replace(" ", "_")
-    fname = f"{safe_name}_{s.get('username')}_playlist.m3u"
-    path = os.path.join(OUTPUT_DIR, fname)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
-    # parse and save JSON automatically with progress
-    channels = parse_m3u_to_json(text, verbose=True)
-    json_path = save_playlist_json(safe_name, s.get('username'), channels) if channels else None
+    json_path = os.path.join(OUTPUT_DIR, f"{safe_name}_{s.get('username')}_playlist.json")
+    count = None
+    if res.get("not_modified") and os.path.exists(json_path):
+        # unchanged playlist: the JSON parsed from it last time is still valid;
+        # its size was recorded then, so only older records need to load it
+        count = s.get("playlist_count")
+        if count is None:
+            channels = load_playlist_json(json_path)
+            count = len(channels) if channels is not None else None
+    if count is None:
+        # parse the saved file line by line and stream channels into the JSON writer
+        # (also the recovery path when the old JSON turned out unreadable)
+        with open(path, "r", encoding="utf-8", errors="replace") as fh:
+            json_path, count = save_playlist_json(safe_name, s.get('username'), iter_parse_m3u(fh))
+    if json_path and not count:
+        # nothing parsed: don't leave an empty JSON playlist behind
+        os.remove(json_path)
+        json_path = None
     # update last_check and last_endpoint
     s["last_check"] = int(time.time())
-    s["last_endpoint"] = res.get("endpoint")
+    # only the base: the full get.php URL carries the password
+    s["last_endpoint"] = endpoint_base(res.get("endpoint"))
     s["last_client"] = res.get("client")
+    s["playlist_etag"] = res.get("etag")
+    s["playlist_last_modified"] = res.get("last_modified")
+    s["playlist_count"] = count
     servers[idx] = s
     save_servers(servers)
     print(C.G + f"✅ Playlist saved: {path}" + C.RESET)
     if json_path:
         print(C.G + f"✅ Parsed JSON saved: {json_path}" + C.RESET)
-        print(C.C + f"Parsed {len(channels)} channels." + C.RESET)
+        print(C.C + f"Parsed {count} channels." + C.RESET)
     input("Press ENTER ...")
 
+def _apply_player_api(s, res):
+    """Merge a fetch_player_api_robust-style result into a server record; returns s."""
+    s["last_check"] = int(time.time())
+    if not res.get("ok"):
+        s["last_endpoint"] = None
+        s["last_client"] = None
+        return s
+    if not res.get("not_modified"):
+        data = res.get("data")
+        s["user_info"] = data.get("user_info", {}) or {}
+        s["server_info"] = data.get("server_info", {}) or {}
+    s["etag"] = res.get("etag")
+    s["last_modified"] = res.get("last_modified")
+    # only the base: the full player_api.php URL carries the password
+    s["last_endpoint"] = endpoint_base(res.get("endpoint"))
+    s["last_client"] = res.get("client")
+    return s
+
+def _refresh_one(s, password):
+    """
+    Refresh a single server record in place (used by refresh_all_servers worker threads).
+    password: looked up by the caller, so worker threads never touch the keyring.
+    Returns the same dict; last_endpoint is None when no endpoint answered.
+    """
+    res = fetch_player_api_robust(s.get("server_url"), s.get("username"), password, timeout=DEFAULT_TIMEOUT, verbose=False,
+                                  last_endpoint=s.get("last_endpoint"), etag=s.get("etag"), last_modified=s.get("last_modified"),
+                                  last_client=s.get("last_client"))
+    return _apply_player_api(s, res)
+
+def _print_refresh_status(done, total, s):
+    print(f"\n[{done}/{total}] {s.get('name')} — {s.get('server_url')}")
+    if s.get("last_endpoint"):
+        print(C.G + "  OK" + C.RESET)
+    else:
+        print(C.R + "  Failed." + C.RESET)
+
+def _api_url(base, s, password):
+    return f"{base}/player_api.php?username={s.get('username')}&password={password}"
+
+def _refresh_many_async(servers, passwords):
+    """
+    aiohttp counterpart of running _refresh_one for every server, with the same
+    candidate selection: first each saved last_endpoint alone (with its
+    conditional headers), then, only for servers that still failed, the
+    TCP/HEAD-culled remaining candidates raced together. Returns results in order.
+    """
+    last_bases = [endpoint_base(s.get("last_endpoint")) for s in servers]
+    results = fetch_async.fetch_player_api_many(
+        [[_api_url(b, s, p)] if b else [] for s, p, b in zip(servers, passwords, last_bases)], USER_AGENT,
+        timeout=DEFAULT_TIMEOUT, connect_timeout=PROBE_TIMEOUT,
+        headers_list=[conditional_headers(s.get("etag"), s.get("last_modified")) if b else None
+                      for s, b in zip(servers, last_bases)])
+    results = [_keep_validators(res, s.get("etag"), s.get("last_modified")) for s, res in zip(servers, results)]
+    retry = [i for i, res in enumerate(results) if not res.get("ok")]
+    if retry:
+        # the culling probes are blocking; run them for all servers side by side
+        with ThreadPoolExecutor(max_workers=min(len(retry), REFRESH_WORKERS)) as pool:
+            candidates = list(pool.map(lambda i: _remaining_endpoints(servers[i].get("server_url"), last_bases[i], False), retry))
+        raced = fetch_async.fetch_player_api_many(
+            [[_api_url(b, servers[i], passwords[i]) for b in bases] for i, bases in zip(retry, candidates)],
+            USER_AGENT, timeout=DEFAULT_TIMEOUT)
+        for i, res in zip(retry, raced):
+            results[i] = res
+    return results
+
 def refresh_all_servers():
     servers = load_servers()
     if not servers:
@@ -705,25 +1327,24 @@ def refresh_all_servers():
         input("Press ENTER ...")
         return
     clear()
-    print(C.B + C.C + "🔄 Refreshing all saved servers..." + C.RESET)
-    for i, s in enumerate(servers):
-        print(f"\n{i+1}. {s.get('name')} — {s.get('server_url')}")
-        res = fetch_player_api_robust(s.get("server_url"), s.get("username"), s.get("password"), timeout=DEFAULT_TIMEOUT, verbose=False)
-        if not res.get("ok"):
-            print(C.R + "  Failed." + C.RESET)
-            s["last_endpoint"] = None
-            s["last_client"] = None
-            s["last_check"] = int(time.time())
-            servers[i] = s
-            continue
-        data = res.get("data")
-        s["user_info"] = data.get("user_info", {}) or {}
-        s["server_info"] = data.get("server_info", {}) or {}
-        s["last_endpoint"] = res.get("endpoint")
-        s["last_client"] = res.get("client")
-        s["last_check"] = int(time.time())
-        servers[i] = s
-        print(C.G + "  OK" + C.RESET)
+    print(f"{BC}🔄 Refreshing all saved servers...{RST}")
+    total = len(servers)
+    # one keyring lookup per server, here on the main thread
+    passwords = [server_password(s) for s in servers]
+    if HAS_AIOHTTP and not HAS_CLOUDSCRAPER:
+        # one event loop and one connector for every server x candidate probe;
+        # skipped when cloudscraper is installed since aiohttp can't pass Cloudflare
+        for done, (s, res) in enumerate(zip(servers, _refresh_many_async(servers, passwords)), 1):
+            _print_refresh_status(done, total, _apply_player_api(s, res))
+    else:
+        # every server is an independent backend, so refresh them side by side
+        with ThreadPoolExecutor(max_workers=min(total, REFRESH_WORKERS)) as pool:
+            futures = [pool.submit(_refresh_one, s, p) for s, p in zip(servers, passwords)]
+            done = 0
+            for fut in as_completed(futures):
+                done += 1
+                _print_refresh_status(done, total, fut.result())
+            servers = [f.result() for f in futures]
     save_servers(servers)
     print(C.G + "\n✅ All done." + C.RESET)
     input("Press ENTER ...")
@@ -732,7 +1353,7 @@ def refresh_all_servers():
 def manage_playlists_menu():
     while True:
         clear()
-        print(C.B + C.C + "🎛️ Playlist Manager" + C.RESET)
+        print(f"{BC}🎛️ Playlist Manager{RST}")
         m3us, jsons = list_output_playlists()
         print(C.G + "M3U files:" + C.RESET)
         if m3us:
@@ -765,8 +1386,6 @@ def manage_playlists_menu():
                     raise ValueError()
                 file = m3us[idx-1]
                 path = os.path.join(OUTPUT_DIR, file)
-                text = open(path, "r", encoding="utf-8", errors="replace").read()
-                channels = parse_m3u_to_json(text, verbose=True)
                 base = os.path.splitext(file)[0]
                 parts = base.split("_")
                 if len(parts) >= 2:
@@ -775,9 +1394,11 @@ def manage_playlists_menu():
                 else:
                     safe_name = base
                     username = "user"
-                json_path = save_playlist_json(safe_name, username, channels)
+                # decode and parse the file in one streaming pass instead of read() + finditer
+                with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                    json_path, count = save_playlist_json(safe_name, username, iter_parse_m3u(fh))
                 if json_path:
-                    print(C.G + f"Saved JSON: {json_path} ({len(channels)} channels)" + C.RESET)
+                    print(C.G + f"Saved JSON: {json_path} ({count} channels)" + C.RESET)
                 else:
                     print(C.R + "Failed to save JSON." + C.RESET)
             except Exception as e:
@@ -802,7 +1423,7 @@ def manage_playlists_menu():
                 print("Filter fields: [title] [group] [tvg-name] [tvg-id] (leave blank to skip)")
                 field = input("Field to filter by (e.g., title/group): ").strip() or "title"
                 keyword = input("Keyword (substring, case-insensitive): ").strip()
-                filtered = filter_channels(channels, field, keyword)
+                filtered = filter_channels(channels, field, keyword, playlist_column(path, field) if keyword else None)
                 print(C.C + f"Found {len(filtered)} matching channels." + C.RESET)
                 if not filtered:
                     input("Press ENTER ...")
@@ -817,25 +1438,11 @@ def manage_playlists_menu():
                 ok = create_m3u_from_channels(filtered, out_path)
                 if ok:
                     print(C.G + f"✅ Created filtered M3U: {out_path}" + C.RESET)
-                    # also save as JSON via streaming writer to show progress
+                    # also save as JSON with the same batched writer as parsed playlists
                     try:
                         json_out = os.path.splitext(out_fname)[0] + ".json"
                         json_out_path = os.path.join(OUTPUT_DIR, json_out)
-                        # reuse save logic by naming accordingly
-                        # we will write directly for clarity
-                        with open(json_out_path, "w", encoding="utf-8") as fh:
-                            fh.write("[\n")
-                            total = len(filtered)
-                            for i, ch in enumerate(filtered):
-                                dumped = json.dumps(ch, ensure_ascii=False, indent=2)
-                                indented = "\n".join(["  " + line for line in dumped.splitlines()])
-                                fh.write(indented)
-                                if i < total - 1:
-                                    fh.write(",\n")
-                                else:
-                                    fh.write("\n")
-                                print_progress_bar(i + 1, total, prefix="  Saving JSON", length=40)
-                            fh.write("]\n")
+                        write_channels_json(json_out_path, filtered)
                         print(C.G + f"✅ Also saved JSON: {json_out_path}" + C.RESET)
                     except Exception as e:
                         print(C.R + f"Failed to save JSON for filtered list: {e}" + C.RESET)
@@ -855,23 +1462,27 @@ def manage_playlists_menu():
                     raise ValueError()
                 file = jsons[idx-1]
                 path = os.path.join(OUTPUT_DIR, file)
-                channels = load_playlist_json(path)
-                if channels is None:
-                    input("Press ENTER ...")
-                    continue
-                print(C.C + f"Loaded {len(channels)} channels from {file}" + C.RESET)
+                if not HAS_IJSON:
+                    channels = load_playlist_json(path)
+                    if channels is None:
+                        input("Press ENTER ...")
+                        continue
+                    print(C.C + f"Loaded {len(channels)} channels from {file}" + C.RESET)
                 sample_n = int(input("How many sample entries to show? (0 to cancel): ").strip() or "0")
                 if sample_n > 0:
-                    total = min(sample_n, len(channels))
-                    for i, ch in enumerate(channels[:total], 1):
-                        print_progress_bar(i, total, prefix="  Showing samples", length=30)
-                        print(f"\n[{i}] Title: {ch.get('title')}")
-                        print(f"     URL: {ch.get('url')}")
-                        print(f"     Group: {(ch.get('attrs') or {}).get('group-title')}")
-                        print(f"     tvg-name: {(ch.get('attrs') or {}).get('tvg-name')}")
-                    # ensure newline after progress
-                    if total:
-                        print()
+                    # only the first sample_n items are decoded when ijson is available
+                    samples = list(islice(iter_playlist_json(path), sample_n))
+                    # format every sample first, then hand the terminal one write
+                    lines = []
+                    for i, ch in enumerate(samples, 1):
+                        attrs = ch.get('attrs') or {}
+                        lines.append(f"\n[{i}] Title: {ch.get('title')}")
+                        lines.append(f"     URL: {ch.get('url')}")
+                        lines.append(f"     Group: {attrs.get('group-title')}")
+                        lines.append(f"     tvg-name: {attrs.get('tvg-name')}")
+                    if lines:
+                        sys.stdout.write("\n".join(lines) + "\n\n")
+                        sys.stdout.flush()
                 input("Press ENTER ...")
             except Exception as e:
                 print(C.R + f"Invalid input: {e}" + C.RESET)
@@ -885,7 +1496,11 @@ def manage_playlists_menu():
 # debug viewing
 def list_debug_files():
     ensure_dirs()
-    files = sorted(os.listdir(DEBUG_DIR), reverse=True)
+    # names start with the save timestamp, so a reverse name sort is newest first;
+    # scandir's is_file() comes from the directory entry, no stat per file
+    with os.scandir(DEBUG_DIR) as it:
+        files = [e.name for e in it if e.is_file()]
+    files.sort(reverse=True)
     return files
 
 def show_debug_files():
@@ -903,7 +1518,7 @@ def show_debug_files():
         file = files[choice-1]
         path = os.path.join(DEBUG_DIR, file)
         clear()
-        print(C.B + C.C + f"--- DEBUG: {file} ---" + C.RESET)
+        print(f"{BC}--- DEBUG: {file} ---{RST}")
         with open(path, "r", encoding="utf-8", errors="replace") as fh:
             content = fh.read()
             print(content)
@@ -916,10 +1531,10 @@ def main_menu():
     ensure_dirs()
     while True:
         clear()
-        print(C.B + C.C + "╔════════════════════════════════════════╗" + C.RESET)
-        print(C.B + C.C + "║      Xfitcher PRO - Xtream Manager     ║"+C.RESET)
-        print(C.B+C.C+"║           Anirbansumon                 ║" + C.RESET)
-        print(C.B + C.C + "╚════════════════════════════════════════╝" + C.RESET)
+        print(f"{BC}╔════════════════════════════════════════╗{RST}")
+        print(f"{BC}║      Xfitcher PRO - Xtream Manager     ║{RST}")
+        print(f"{BC}║           Anirbansumon                 ║{RST}")
+        print(f"{BC}╚════════════════════════════════════════╝{RST}")
         hr()
         print(C.G + "[1]" + C.RESET + " Add New Server")
         print(C.G + "[2]" + C.RESET + " View Saved Servers")
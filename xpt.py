@@ -145,6 +145,15 @@ def save_debug_response(server_name, endpoint, response_text):
         return None
     return path
 
+_SCRAPER = None
+
+def _get_scraper():
+    # one cloudscraper for every request instead of a fresh one per call
+    global _SCRAPER
+    if _SCRAPER is None:
+        _SCRAPER = cloudscraper.create_scraper(browser={'custom': USER_AGENT})
+    return _SCRAPER
+
 def request_with_client(endpoint, timeout=DEFAULT_TIMEOUT, stream=False):
     """
     Use cloudscraper if available (Cloudflare bypass), else requests.
@@ -154,7 +163,7 @@ def request_with_client(endpoint, timeout=DEFAULT_TIMEOUT, stream=False):
     headers = {"User-Agent": USER_AGENT}
     if HAS_CLOUDSCRAPER:
         try:
-            scr = cloudscraper.create_scraper(browser={'custom': USER_AGENT})
+            scr = _get_scraper()
             r = scr.get(endpoint, timeout=timeout, headers=headers, allow_redirects=True, stream=stream)
             return (r, "cloudscraper")
         except Exception as e:
@@ -282,8 +291,8 @@ def fetch_playlist_robust(server_url, username, password, m3u_type="m3u_plus", t
             except:
                 pass
 
-            # Validate M3U signature
-            if "#EXTM3U" in text.upper():
+            # Validate M3U signature (it sits at the top, so only upper-case the first KB)
+            if "#EXTM3U" in text[:1024].upper():
                 return {"ok": True, "endpoint": pl_url, "client": client, "text": text}
             else:
                 # not a valid M3U but still save to debug
@@ -309,6 +318,11 @@ def fetch_playlist_robust(server_url, username, password, m3u_type="m3u_plus", t
     return {"ok": False}
 
 # --------- M3U parsing / JSON / Filter / Rebuild ----------
+# format: #EXTINF:-1 tvg-id="..." tvg-name="..." ,Channel Title
+# (attrs is everything up to the first comma, title everything after it)
+_EXTINF_RE = re.compile(r'#EXTINF:?(?P<duration>[-0-9]*)(?P<attrs>[^,]*),?(?P<title>.*)', re.IGNORECASE)
+_ATTR_RE = re.compile(r'([a-zA-Z0-9\-_]+)="([^"]*)"')
+
 def parse_m3u_to_json(m3u_text):
     """
     Parse an M3U (EXTM3U) playlist into a list of channel dicts.
@@ -327,21 +341,13 @@ def parse_m3u_to_json(m3u_text):
         if not ln:
             i += 1
             continue
-        if ln.upper().startswith("#EXTINF"):
+        m = _EXTINF_RE.match(ln)
+        if m:
             raw_extinf = ln
-            # try to extract duration and attributes and title
-            # format: #EXTINF:-1 tvg-id="..." tvg-name="..." ,Channel Title
-            # split header and title by the first comma
-            parts = ln.split(",", 1)
-            if len(parts) == 2:
-                header, title = parts[0], parts[1].strip()
-            else:
-                header, title = parts[0], ""
-            # duration after colon
-            dur_match = re.match(r'#EXTINF:([-0-9]+)', header, re.IGNORECASE)
-            duration = dur_match.group(1) if dur_match else ""
-            # attributes: find key="value" pairs
-            attrs = dict(re.findall(r'([a-zA-Z0-9\-_]+?)="(.*?)"', header))
+            # duration, attribute header and title in one precompiled match
+            title = m["title"].strip()
+            duration = m["duration"]
+            attrs = dict(_ATTR_RE.findall(m["attrs"]))
             # Next non-empty non-comment line should be URL
             url = ""
             j = i + 1
@@ -406,12 +412,11 @@ def build_extinf_line(entry):
 
 def create_m3u_from_channels(channels, out_path):
     try:
-        with open(out_path, "w", encoding="utf-8") as fh:
+        with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as fh:
             fh.write("#EXTM3U\n")
+            # one formatted write per channel into a 1 MiB buffer
             for ch in channels:
-                ext = build_extinf_line(ch)
-                fh.write(ext + "\n")
-                fh.write((ch.get("url") or "") + "\n")
+                fh.write(f"{build_extinf_line(ch)}\n{ch.get('url') or ''}\n")
     except Exception as e:
         print(C.R + f"Failed to write M3U: {e}" + C.RESET)
         return False
@@ -7,6 +7,7 @@ import os
 import json
 import time
 import requests
+import shutil
 from getpass import getpass
 
 # Try optional cloudscraper for CF bypass
@@ -143,22 +144,32 @@ def save_debug_response(server_name, endpoint, response_text):
         return None
     return path
 
-def request_with_client(endpoint, timeout=DEFAULT_TIMEOUT):
+_SCRAPER = None
+
+def _get_scraper():
+    # one cloudscraper for every request instead of a fresh one per call
+    global _SCRAPER
+    if _SCRAPER is None:
+        _SCRAPER = cloudscraper.create_scraper(browser={'custom': USER_AGENT})
+    return _SCRAPER
+
+def request_with_client(endpoint, timeout=DEFAULT_TIMEOUT, stream=False):
     """
     Use cloudscraper if available (Cloudflare bypass), else requests.
     Returns tuple (response_obj_or_exception, used_client_name)
+    stream: if True, leave the body unread so it can be copied from resp.raw
     """
     headers = {"User-Agent": USER_AGENT}
     if HAS_CLOUDSCRAPER:
         try:
-            scr = cloudscraper.create_scraper(browser={'custom': USER_AGENT})
-            r = scr.get(endpoint, timeout=timeout, headers=headers)
+            scr = _get_scraper()
+            r = scr.get(endpoint, timeout=timeout, headers=headers, stream=stream)
             return (r, "cloudscraper")
         except Exception as e:
             # fallback to requests
             pass
     try:
-        r = requests.get(endpoint, timeout=timeout, headers=headers, allow_redirects=True)
+        r = requests.get(endpoint, timeout=timeout, headers=headers, allow_redirects=True, stream=stream)
         return (r, "requests")
     except Exception as e:
         return (e, "requests")
@@ -209,13 +220,18 @@ def fetch_player_api_robust(server_url, username, password, timeout=DEFAULT_TIME
     return {"ok": False, "tried": tried}
 
 # Robust playlist fetch (m3u)
-def fetch_playlist_robust(server_url, username, password, m3u_type="m3u_plus", timeout=DEFAULT_TIMEOUT, verbose=True):
+def fetch_playlist_robust(server_url, username, password, out_path, m3u_type="m3u_plus", timeout=DEFAULT_TIMEOUT, verbose=True):
+    """
+    The body is streamed straight into out_path (via a .part file): only the first
+    few KB are inspected for #EXTM3U, the rest is copied from resp.raw unread.
+    Returns dict with ok/endpoint/client/path.
+    """
     endpoints = generate_endpoints(server_url)
     for base in endpoints:
         pl_url = f"{base}/get.php?username={username}&password={password}&type={m3u_type}"
         if verbose:
             print(C.Y + "Trying playlist endpoint:" + C.RESET, pl_url)
-        resp, client = request_with_client(pl_url, timeout=timeout)
+        resp, client = request_with_client(pl_url, timeout=timeout, stream=True)
         if isinstance(resp, Exception):
             if verbose:
                 print(C.R + f"  Error ({client}): {resp}" + C.RESET)
@@ -223,18 +239,38 @@ def fetch_playlist_robust(server_url, username, password, m3u_type="m3u_plus", t
         if getattr(resp, "status_code", None) != 200:
             if verbose:
                 print(C.R + f"  HTTP status {resp.status_code}" + C.RESET)
+            resp.close()
             continue
-        text = resp.text or ""
-        # M3U often begins with #EXTM3U
-        if "#EXTM3U" in text.upper():
-            return {"ok": True, "endpoint": pl_url, "client": client, "text": text}
-        else:
-            # not a valid M3U but still save to debug
-            path = save_debug_response("playlist_nonm3u", pl_url, text)
+        part_path = out_path + ".part"
+        try:
+            # read through the raw stream but still undo gzip/deflate
+            resp.raw.decode_content = True
+            head = resp.raw.read(4096)
+            # M3U often begins with #EXTM3U
+            if b"#EXTM3U" in head.upper():
+                with open(part_path, "wb") as fh:
+                    fh.write(head)
+                    shutil.copyfileobj(resp.raw, fh, 64 * 1024)
+                os.replace(part_path, out_path)
+                return {"ok": True, "endpoint": pl_url, "client": client, "path": out_path}
+            else:
+                # not a valid M3U but still save to debug
+                text = (head + resp.raw.read(500000)).decode("utf-8", errors="replace")
+                path = save_debug_response("playlist_nonm3u", pl_url, text)
+                if verbose:
+                    print(C.Y + "  Response not M3U. Saved raw for debugging:", path)
+                # still consider returning raw? For now treat as failure
+                continue
+        except Exception as e:
             if verbose:
-                print(C.Y + "  Response not M3U. Saved raw for debugging:", path)
-            # still consider returning raw? For now treat as failure
+                print(C.R + f"  Error while streaming: {e}" + C.RESET)
+            try:
+                os.remove(part_path)
+            except:
+                pass
             continue
+        finally:
+            resp.close()
     return {"ok": False}
 
 # --------- Core Features (same interface as before) ----------
@@ -403,17 +439,15 @@ def fetch_and_save_playlist(idx):
     s = servers[idx]
     clear()
     print(C.B + C.C + f"🎵 Fetch Playlist — {s.get('name')}" + C.RESET)
-    res = fetch_playlist_robust(s.get("server_url"), s.get("username"), s.get("password"), verbose=True)
+    safe_name = s.get('name', 'server').replace(" ", "_")
+    fname = f"{safe_name}_{s.get('username')}_playlist.m3u"
+    path = os.path.join(OUTPUT_DIR, fname)
+    ensure_dirs()
+    res = fetch_playlist_robust(s.get("server_url"), s.get("username"), s.get("password"), path, verbose=True)
     if not res.get("ok"):
         print(C.R + "❌ Failed to fetch a valid M3U playlist. Check debug files." + C.RESET)
         input("Press ENTER ...")
         return
-    text = res.get("text", "")
-    safe_name = s.get('name', 'server').replace(" ", "_")
-    fname = f"{safe_name}_{s.get('username')}_playlist.m3u"
-    path = os.path.join(OUTPUT_DIR, fname)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
     # update last_check and last_endpoint
     s["last_check"] = int(time.time())
     s["last_endpoint"] = res.get("endpoint")